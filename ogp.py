@@ -1,13 +1,20 @@
 import os
 import asyncio
 import logging
+import random
+import re
+import time
 import traceback
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Tuple
 from aiohttp import web
 
 import aiohttp
+import orjson
 import telegram
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import TelegramError
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
@@ -28,10 +35,80 @@ logger = logging.getLogger(__name__)
 AWAITING_TOKENS = 0
 POSITION_URL = "https://ceremony-backend.silentprotocol.org/ceremony/position"
 PING_URL = "https://ceremony-backend.silentprotocol.org/ceremony/ping"
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 3
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 30
+MAX_CONCURRENCY = 32  # in-flight backend requests, matches the connector's per-host limit
+_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+MONITOR_INTERVAL = 60  # seconds between status checks while monitoring
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for a single message
+CACHE_TTL = 10  # seconds a backend response is reused for identical requests
+_ACTION_RE = re.compile(r"^(remove|info)_(\d+)$")  # per-token button callback data
+
+# Static keyboards, built once and shared by every handler
+MAIN_MENU_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Tokens", callback_data="tokens"),
+            InlineKeyboardButton("Position", callback_data="position"),
+        ],
+        [
+            InlineKeyboardButton("Start Monitoring", callback_data="start_monitoring"),
+            InlineKeyboardButton("Stop Monitoring", callback_data="stop_monitoring"),
+        ],
+        [InlineKeyboardButton("About", callback_data="about")],
+    ]
+)
+TOKEN_MENU_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Add Tokens", callback_data="add_tokens"),
+            InlineKeyboardButton("Remove Tokens", callback_data="remove_tokens"),
+            InlineKeyboardButton("Token Info", callback_data="token_info"),
+        ],
+        [InlineKeyboardButton("Main Menu", callback_data="back_to_main")],
+    ]
+)
+ABOUT_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Main Menu", callback_data="back_to_main")]]
+)
+TOKEN_INFO_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Back", callback_data="token_info")]]
+)
 
 # Storage
-user_tokens: Dict[int, List[str]] = {}
-monitoring_tasks: Dict[int, List[asyncio.Task]] = {}
+_UNREPORTED = object()  # prev_* value for a token whose status was never sent
+
+@dataclass
+class UserState:
+    # Parallel lists indexed by token position
+    tokens: List[str] = field(default_factory=list)
+    shorts: List[str] = field(default_factory=list)  # format_token(), computed once
+    prev_ping: List[Any] = field(default_factory=list)
+    prev_pos: List[Any] = field(default_factory=list)
+
+    def add(self, tokens: List[str]) -> None:
+        self.tokens.extend(tokens)
+        self.shorts.extend(format_token(t) for t in tokens)
+        self.prev_ping.extend([_UNREPORTED] * len(tokens))
+        self.prev_pos.extend([_UNREPORTED] * len(tokens))
+
+    def remove(self, index: int) -> str:
+        del self.shorts[index]
+        del self.prev_ping[index]
+        del self.prev_pos[index]
+        return self.tokens.pop(index)
+
+users: Dict[int, UserState] = {}
+monitoring_tasks: Dict[int, asyncio.Task] = {}
+SESSION: Optional[aiohttp.ClientSession] = None
+_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+_OWNER_GONE = object()  # in-flight result when the owning request never finished
+_HEADER_CACHE: Dict[str, Dict[str, str]] = {}
+_SEM: Optional[asyncio.Semaphore] = None  # created in get_session() on the running loop
+_user_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
 # Web Server Setup
 async def health_handler(request):
@@ -54,83 +131,183 @@ def format_token(token: str) -> str:
     return f"...{token[-6:]}" if len(token) > 6 else token
 
 def get_headers(token: str) -> Dict[str, str]:
-    return {
-        "Authorization": f"Bearer {token}",
-        "Accept": "*/*",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-    }
+    headers = _HEADER_CACHE.get(token)
+    if headers is None:
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "*/*",
+            "User-Agent": _UA,
+        }
+        _HEADER_CACHE[token] = headers
+    return headers
+
+async def get_session() -> aiohttp.ClientSession:
+    global SESSION, _SEM
+    if _SEM is None:
+        _SEM = asyncio.Semaphore(MAX_CONCURRENCY)
+    if SESSION is None or SESSION.closed:
+        SESSION = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=MAX_CONCURRENCY, ttl_dns_cache=300, keepalive_timeout=75
+            ),
+        )
+    return SESSION
+
+async def _request_json(
+    url: str, token: str, label: str, fields: Tuple[str, ...]
+) -> Optional[Dict]:
+    session = await get_session()
+    for attempt in range(MAX_RETRIES):
+        try:
+            async with _SEM, session.get(url, headers=get_headers(token)) as response:
+                if response.status != 200:
+                    logger.warning(
+                        f"[{format_token(token)}] {label} error: HTTP {response.status}"
+                    )
+                    return None
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(
+                f"[{format_token(token)}] {label} error "
+                f"(attempt {attempt + 1}/{MAX_RETRIES}): {str(e)}"
+            )
+            if attempt + 1 < MAX_RETRIES:
+                # Exponential backoff with jitter so users' retries don't line up
+                delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+            continue
+
+        # A malformed body is a bad response, not a transport error: don't retry
+        try:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"[{format_token(token)}] {label} error: invalid JSON: {e}")
+            return None
+        if not isinstance(data, dict):
+            logger.warning(
+                f"[{format_token(token)}] {label} error: "
+                f"unexpected {type(data).__name__} payload"
+            )
+            return None
+        # Keep only what callers read so cached responses stay small. A missing
+        # field stays missing so callers' .get() fallbacks still apply.
+        return {k: data[k] for k in fields if k in data}
+    return None
+
+async def cached_request(
+    url: str, token: str, label: str, fields: Tuple[str, ...]
+) -> Optional[Dict]:
+    key = (url, token)
+    cached = _cache.get(key)
+    if cached and time.monotonic() - cached[0] < CACHE_TTL:
+        return cached[1]
+
+    # Piggyback on an identical request that is already in flight. If its
+    # owner is cancelled or fails it resolves to _OWNER_GONE and we go again;
+    # a CancelledError here is always our own.
+    while True:
+        inflight = _inflight.get(key)
+        if inflight is None:
+            break
+        result = await asyncio.shield(inflight)
+        if result is not _OWNER_GONE:
+            return result
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        data = await _request_json(url, token, label, fields)
+        if data is not None:
+            now = time.monotonic()
+            for stale in [k for k, (ts, _) in _cache.items() if now - ts >= CACHE_TTL]:
+                del _cache[stale]
+            _cache[key] = (now, data)
+        future.set_result(data)
+        return data
+    finally:
+        if not future.done():
+            future.set_result(_OWNER_GONE)
+        del _inflight[key]
 
 async def get_position(token: str) -> Optional[Dict]:
-    ts = format_token(token)
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                POSITION_URL, headers=get_headers(token), timeout=None
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                logger.warning(f"[{ts}] Position error: HTTP {response.status}")
-                return None
-    except Exception as e:
-        logger.error(f"[{ts}] Position error: {str(e)}")
-        return None
+    return await cached_request(POSITION_URL, token, "Position", ("behind",))
 
 async def ping_server(token: str) -> Optional[Dict]:
-    ts = format_token(token)
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                PING_URL, headers=get_headers(token), timeout=None
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                logger.warning(f"[{ts}] Ping error: HTTP {response.status}")
-                return None
-    except Exception as e:
-        logger.error(f"[{ts}] Ping error: {str(e)}")
-        return None
-
-async def monitor_token(bot: telegram.Bot, user_id: int, token: str) -> None:
+    return await cached_request(PING_URL, token, "Ping", ("status",))
+
+async def fetch_token_state(token: str) -> List[Optional[Dict]]:
+    return await asyncio.gather(ping_server(token), get_position(token))
+
+def split_message(header: str, blocks: List[str]) -> List[str]:
+    # Pack blocks under a repeated header into messages Telegram will accept
+    messages = []
+    current = header
+    for block in blocks:
+        if current != header and len(current) + 1 + len(block) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = header
+        current += "\n" + block
+    if current != header:
+        messages.append(current)
+    return messages
+
+async def monitor_user(bot: telegram.Bot, user_id: int) -> None:
+    # Report every token on the first tick after (re)starting
+    if user_id in users:
+        state = users[user_id]
+        state.prev_ping[:] = [_UNREPORTED] * len(state.tokens)
+        state.prev_pos[:] = [_UNREPORTED] * len(state.tokens)
     try:
         while True:
-            ping_data = await ping_server(token)
-            position_data = await get_position(token)
-
-            status = (
-                f"• *{format_token(token)}*:\n"
-                f"  Status: `{ping_data.get('status', 'N/A') if ping_data else 'Error'}`\n"
-                f"  Position: `{position_data.get('behind', 'N/A') if position_data else 'Error'}`"
+            state = users.get(user_id) or UserState()
+            tokens = list(state.tokens)
+            results = await asyncio.gather(
+                *(fetch_token_state(t) for t in tokens), return_exceptions=True
             )
 
-            await bot.send_message(
-                user_id, f"🔄 Status Update:\n{status}", parse_mode="Markdown"
-            )
-            await asyncio.sleep(60)  # Add a delay to avoid spamming
+            updates = []
+            for i, (token, result) in enumerate(zip(tokens, results)):
+                # Skip tokens removed while the requests were in flight
+                if i >= len(state.tokens) or state.tokens[i] != token:
+                    continue
+                ping_data, position_data = (
+                    (None, None) if isinstance(result, BaseException) else result
+                )
+                # Compare what is displayed, so "N/A" and "Error" stay distinct
+                ping = ping_data.get("status", "N/A") if ping_data is not None else "Error"
+                pos = (
+                    position_data.get("behind", "N/A")
+                    if position_data is not None
+                    else "Error"
+                )
+                if ping != state.prev_ping[i] or pos != state.prev_pos[i]:
+                    updates.append(
+                        f"• *{state.shorts[i]}*:\n"
+                        f"  Status: `{ping}`\n"
+                        f"  Position: `{pos}`"
+                    )
+                state.prev_ping[i] = ping
+                state.prev_pos[i] = pos
+
+            for message in split_message("🔄 Status Update:", updates):
+                try:
+                    await bot.send_message(user_id, message, parse_mode="Markdown")
+                except TelegramError as e:
+                    logger.error(f"Failed to send status update to {user_id}: {e}")
+            await asyncio.sleep(MONITOR_INTERVAL)
 
     except asyncio.CancelledError:
-        logger.info(f"Monitoring stopped for token {format_token(token)}")
+        logger.info(f"Monitoring stopped for user {user_id}")
     except Exception as e:
         logger.error(f"Critical failure: {traceback.format_exc()}")
-        await bot.send_message(
-            user_id, f"❌ Monitoring crashed for {format_token(token)} - restart required"
-        )
+        await bot.send_message(user_id, "❌ Monitoring crashed - restart required")
 
 # Bot Handlers
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    keyboard = [
-        [
-            InlineKeyboardButton("Tokens", callback_data="tokens"),
-            InlineKeyboardButton("Position", callback_data="position"),
-        ],
-        [
-            InlineKeyboardButton("Start Monitoring", callback_data="start_monitoring"),
-            InlineKeyboardButton("Stop Monitoring", callback_data="stop_monitoring"),
-        ],
-        [InlineKeyboardButton("About", callback_data="about")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
-        "🔍 Silent Protocol Monitoring Bot\nChoose an option:", reply_markup=reply_markup
+        "🔍 Silent Protocol Monitoring Bot\nChoose an option:",
+        reply_markup=MAIN_MENU_MARKUP,
     )
 
 async def handle_button_click(
@@ -140,57 +317,41 @@ async def handle_button_click(
     await query.answer()
     user_id = update.effective_user.id
 
-    if user_id not in user_tokens:
-        user_tokens[user_id] = []
+    if user_id not in users:
+        users[user_id] = UserState()
 
-    if query.data == "tokens":
-        await show_token_menu(query)
-    elif query.data == "add_tokens":
-        await query.edit_message_text(
-            "📥 Send tokens (one per line):\nExample:\ntoken1\ntoken2\ntoken3"
-        )
-        return AWAITING_TOKENS
-    elif query.data == "remove_tokens":
-        await show_remove_menu(query, user_id)
-    elif query.data == "token_info":
-        await show_info_menu(query, user_id)
-    elif query.data == "back_to_main":
-        await return_to_main(query)
-    elif query.data == "position":
-        await fetch_positions(context, user_id)
-    elif query.data == "start_monitoring":
-        await start_monitoring(query, context, user_id)
-    elif query.data == "stop_monitoring":
-        await stop_monitoring(query, user_id)
-    elif query.data == "about":
-        await show_about(query)
-    elif query.data.startswith(("remove_", "info_")):
-        await handle_token_actions(query, user_id)
+    handler = DISPATCH.get(query.data)
+    if handler:
+        result = await handler(query, context, user_id)
+        if result is not None:
+            return result
+    else:
+        match = _ACTION_RE.match(query.data)
+        if match:
+            await handle_token_actions(
+                query, user_id, match.group(1), int(match.group(2))
+            )
 
     return ConversationHandler.END
 
-async def show_token_menu(query: Any) -> None:
-    menu = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("Add Tokens", callback_data="add_tokens"),
-                InlineKeyboardButton("Remove Tokens", callback_data="remove_tokens"),
-                InlineKeyboardButton("Token Info", callback_data="token_info"),
-            ],
-            [InlineKeyboardButton("Main Menu", callback_data="back_to_main")],
-        ]
+async def prompt_tokens(query: Any) -> int:
+    await query.edit_message_text(
+        "📥 Send tokens (one per line):\nExample:\ntoken1\ntoken2\ntoken3"
     )
-    await query.edit_message_text("🔑 Token Management", reply_markup=menu)
+    return AWAITING_TOKENS
+
+async def show_token_menu(query: Any) -> None:
+    await query.edit_message_text("🔑 Token Management", reply_markup=TOKEN_MENU_MARKUP)
 
 async def show_remove_menu(query: Any, user_id: int) -> None:
-    tokens = user_tokens.get(user_id, [])
-    if not tokens:
+    shorts = users[user_id].shorts if user_id in users else []
+    if not shorts:
         await query.edit_message_text("❌ No tokens to remove")
         return
 
     keyboard = [
-        [InlineKeyboardButton(f"Remove {format_token(token)}", callback_data=f"remove_{i}")]
-        for i, token in enumerate(tokens)
+        [InlineKeyboardButton(f"Remove {short}", callback_data=f"remove_{i}")]
+        for i, short in enumerate(shorts)
     ]
     keyboard.append([InlineKeyboardButton("Back", callback_data="tokens")])
     await query.edit_message_text(
@@ -198,55 +359,44 @@ async def show_remove_menu(query: Any, user_id: int) -> None:
     )
 
 async def show_info_menu(query: Any, user_id: int) -> None:
-    tokens = user_tokens.get(user_id, [])
-    if not tokens:
+    shorts = users[user_id].shorts if user_id in users else []
+    if not shorts:
         await query.edit_message_text("❌ No tokens to view")
         return
 
     keyboard = [
-        [InlineKeyboardButton(f"Info {format_token(token)}", callback_data=f"info_{i}")]
-        for i, token in enumerate(tokens)
+        [InlineKeyboardButton(f"Info {short}", callback_data=f"info_{i}")]
+        for i, short in enumerate(shorts)
     ]
     keyboard.append([InlineKeyboardButton("Back", callback_data="tokens")])
     await query.edit_message_text(
         "Select token to view:", reply_markup=InlineKeyboardMarkup(keyboard)
     )
 
-async def handle_token_actions(query: Any, user_id: int) -> None:
-    data = query.data
-    tokens = user_tokens.get(user_id, [])
-
-    if data.startswith("remove_"):
-        index = int(data[len("remove_") :])
-        if 0 <= index < len(tokens):
-            removed = tokens.pop(index)
-            await query.edit_message_text(f"✅ Removed token: {format_token(removed)}")
-        else:
-            await query.edit_message_text("❌ Invalid token selection")
-
-    elif data.startswith("info_"):
-        index = int(data[len("info_") :])
-        if 0 <= index < len(tokens):
-            await show_token_info(query, tokens[index])
-        else:
-            await query.edit_message_text("❌ Invalid token selection")
+async def handle_token_actions(query: Any, user_id: int, kind: str, index: int) -> None:
+    state = users.setdefault(user_id, UserState())
+    tokens = state.tokens
+
+    if not 0 <= index < len(tokens):
+        await query.edit_message_text("❌ Invalid token selection")
+    elif kind == "remove":
+        short = state.shorts[index]
+        removed = state.remove(index)
+        _HEADER_CACHE.pop(removed, None)
+        await query.edit_message_text(f"✅ Removed token: {short}")
+    else:
+        await show_token_info(query, tokens[index], state.shorts[index])
 
-async def show_token_info(query: Any, token: str) -> None:
-    ping = await ping_server(token)
-    position = await get_position(token)
+async def show_token_info(query: Any, token: str, short: str) -> None:
+    ping, position = await fetch_token_state(token)
 
     text = [
-        f"🔐 Token: {format_token(token)}",
-        f"🟢 Status: {ping.get('status', 'N/A') if ping else 'Error'}",
-        f"📌 Position: {position.get('behind', 'N/A') if position else 'Error'}",
+        f"🔐 Token: {short}",
+        f"🟢 Status: {ping.get('status', 'N/A') if ping is not None else 'Error'}",
+        f"📌 Position: {position.get('behind', 'N/A') if position is not None else 'Error'}",
     ]
 
-    await query.edit_message_text(
-        "\n".join(text),
-        reply_markup=InlineKeyboardMarkup(
-            [[InlineKeyboardButton("Back", callback_data="token_info")]]
-        ),
-    )
+    await query.edit_message_text("\n".join(text), reply_markup=TOKEN_INFO_MARKUP)
 
 async def process_tokens(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_id = update.effective_user.id
@@ -256,23 +406,29 @@ async def process_tokens(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ No valid tokens found.")
         return ConversationHandler.END
 
-    user_tokens.setdefault(user_id, []).extend(tokens)
+    state = users.setdefault(user_id, UserState())
+    state.add(tokens)
     await update.message.reply_text(
-        f"✅ Added {len(tokens)} tokens\nTotal: {len(user_tokens[user_id])}"
+        f"✅ Added {len(tokens)} tokens\nTotal: {len(state.tokens)}"
     )
     return ConversationHandler.END
 
 async def fetch_positions(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> None:
-    if not user_tokens.get(user_id):
+    if user_id not in users or not users[user_id].tokens:
         await context.bot.send_message(user_id, "⚠️ No tokens registered")
         return
 
+    state = users[user_id]
+    positions = await asyncio.gather(
+        *(get_position(t) for t in state.tokens), return_exceptions=True
+    )
+
     response = ["📊 Current Positions:"]
-    for token in user_tokens[user_id]:
-        position = await get_position(token)
-        display = format_token(token)
+    for display, position in zip(state.shorts, positions):
+        if isinstance(position, BaseException):
+            position = None
         response.append(
-            f"• {display}: {position.get('behind', 'Error') if position else 'Error'}"
+            f"• {display}: {position.get('behind', 'Error') if position is not None else 'Error'}"
         )
 
     await context.bot.send_message(user_id, "\n".join(response))
@@ -280,26 +436,27 @@ async def fetch_positions(context: ContextTypes.DEFAULT_TYPE, user_id: int) -> N
 async def start_monitoring(
     query: Any, context: ContextTypes.DEFAULT_TYPE, user_id: int
 ) -> None:
-    if user_id in monitoring_tasks:
-        await query.edit_message_text("🔔 Monitoring already running")
-        return
-
-    monitoring_tasks[user_id] = []
-    for token in user_tokens.get(user_id, []):
-        task = asyncio.create_task(monitor_token(context.bot, user_id, token))
-        monitoring_tasks[user_id].append(task)
+    async with _user_locks[user_id]:
+        task = monitoring_tasks.get(user_id)
+        if task and not task.done():
+            await query.edit_message_text("🔔 Monitoring already running")
+            return
+
+        monitoring_tasks[user_id] = asyncio.create_task(
+            monitor_user(context.bot, user_id)
+        )
 
-    await query.edit_message_text("🚀 Started continuous monitoring for all tokens")
+        await query.edit_message_text("🚀 Started continuous monitoring for all tokens")
 
 async def stop_monitoring(query: Any, user_id: int) -> None:
-    if user_id in monitoring_tasks:
-        for task in monitoring_tasks[user_id]:
+    async with _user_locks[user_id]:
+        if user_id in monitoring_tasks:
+            task = monitoring_tasks.pop(user_id)
             task.cancel()
-        await asyncio.gather(*monitoring_tasks[user_id], return_exceptions=True)
-        del monitoring_tasks[user_id]
-        await query.edit_message_text("🛑 Stopped monitoring")
-    else:
-        await query.edit_message_text("❌ No active monitoring")
+            await asyncio.gather(task, return_exceptions=True)
+            await query.edit_message_text("🛑 Stopped monitoring")
+        else:
+            await query.edit_message_text("❌ No active monitoring")
 
 async def return_to_main(query: Any) -> None:
     await start(query, None)
@@ -309,27 +466,60 @@ async def show_about(query: Any) -> None:
         "🤖 Silent Protocol Monitor Bot\n\n"
         "Track your ceremony participation status\n"
         "Developed by DEFIZO",
-        reply_markup=InlineKeyboardMarkup(
-            [[InlineKeyboardButton("Main Menu", callback_data="back_to_main")]]
-        ),
+        reply_markup=ABOUT_MARKUP,
     )
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     await update.message.reply_text("❌ Operation cancelled")
     return ConversationHandler.END
 
-def main() -> None:
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+# Callback data -> handler, all called as handler(query, context, user_id)
+DISPATCH = {
+    "tokens": lambda q, c, u: show_token_menu(q),
+    "add_tokens": lambda q, c, u: prompt_tokens(q),
+    "remove_tokens": lambda q, c, u: show_remove_menu(q, u),
+    "token_info": lambda q, c, u: show_info_menu(q, u),
+    "back_to_main": lambda q, c, u: return_to_main(q),
+    "position": lambda q, c, u: fetch_positions(c, u),
+    "start_monitoring": start_monitoring,
+    "stop_monitoring": lambda q, c, u: stop_monitoring(q, u),
+    "about": lambda q, c, u: show_about(q),
+}
+
+async def _post_init(application: Application) -> None:
+    runner, _ = await start_web_server()
+    application.bot_data["health_runner"] = runner
+
+async def _post_shutdown(application: Application) -> None:
+    logger.info("Cleaning up resources...")
+    runner = application.bot_data.pop("health_runner", None)
+    if runner:
+        await runner.cleanup()
+    if SESSION is not None:
+        await SESSION.close()
 
+def main() -> None:
     try:
-        runner, app = loop.run_until_complete(start_web_server())
+        import uvloop
 
+        uvloop.install()
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop")
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    try:
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         if not bot_token:
             raise ValueError("Missing TELEGRAM_BOT_TOKEN environment variable")
 
-        application = Application.builder().token(bot_token).build()
+        # Health server and HTTP session live on the loop run_polling manages
+        application = (
+            Application.builder()
+            .token(bot_token)
+            .post_init(_post_init)
+            .post_shutdown(_post_shutdown)
+            .build()
+        )
 
         conv_handler = ConversationHandler(
             entry_points=[CallbackQueryHandler(handle_button_click, pattern="^add_tokens$")],
@@ -350,11 +540,6 @@ def main() -> None:
 
     except Exception as e:
         logger.error(f"Fatal error: {traceback.format_exc()}")
-    finally:
-        logger.info("Cleaning up resources...")
-        if runner:
-            loop.run_until_complete(runner.cleanup())
-        loop.close()
 
 if __name__ == "__main__":
     main()
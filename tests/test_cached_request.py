@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import ogp
+
+
+def _stub_request(monkeypatch, delay):
+    calls = []
+
+    async def fake_request_json(url, token, label, fields):
+        calls.append(token)
+        await asyncio.sleep(delay)
+        return {"behind": 1}
+
+    monkeypatch.setattr(ogp, "_request_json", fake_request_json)
+    monkeypatch.setattr(ogp, "_cache", {})
+    monkeypatch.setattr(ogp, "_inflight", {})
+    return calls
+
+
+def test_owner_and_waiter_cancelled_together(monkeypatch):
+    calls = _stub_request(monkeypatch, 1)
+
+    async def run():
+        gather = asyncio.gather(ogp.get_position("A"), ogp.get_position("A"))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        gather.cancel()
+        await asyncio.gather(gather, return_exceptions=True)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.5
+    assert calls == ["A"]
+    assert ogp._inflight == {}
+
+
+def test_waiter_retries_when_owner_cancelled(monkeypatch):
+    calls = _stub_request(monkeypatch, 0.1)
+
+    async def run():
+        owner = asyncio.ensure_future(ogp.get_position("A"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(ogp.get_position("A"))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await waiter
+
+    assert asyncio.run(run()) == {"behind": 1}
+    assert calls == ["A", "A"]